@@ -3,23 +3,40 @@
 Performance benchmark for the gene mutual information library.
 """
 
+import argparse
 import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 import numpy as np
-import gene_mutual_info
+import scipy.sparse as sp
+import gvmi
 import anndata
 
-def benchmark_mutual_info(n_genes, n_samples):
-    """Benchmark mutual information computation."""
+from gvmi_utils import merge_top
+
+# PCG64 generator shared by the synthetic benchmarks
+rng = np.random.default_rng(42)
+
+def benchmark_mutual_info(n_genes, n_samples, buffer=None):
+    """
+    Benchmark mutual information computation.
+    
+    If given, `buffer` is a (genes × samples) float32 array of random data
+    whose top-left `n_genes` × `n_samples` block is used as the input, so all
+    test cases share one matrix instead of generating a new one each.
+    """
     print(f"Benchmarking with {n_genes} genes and {n_samples} samples...")
     
-    # Create random gene expression data
-    np.random.seed(42)
-    matrix = np.random.randn(n_genes, n_samples)
+    # Random gene expression data; a slice of a larger buffer is a strided
+    # view, which the kernel reads in place
+    if buffer is None or buffer.shape[0] < n_genes or buffer.shape[1] < n_samples:
+        buffer = rng.standard_normal((n_genes, n_samples), dtype=np.float32)
+    matrix = buffer[:n_genes, :n_samples]
     genes = [f"GENE_{i:04d}" for i in range(n_genes)]
     
     # Time the computation
     start_time = time.time()
-    result = gene_mutual_info.compute_mutual_information(matrix, genes)
+    result = gvmi.compute_mutual_information(matrix, genes)
     end_time = time.time()
     
     elapsed = end_time - start_time
@@ -32,44 +49,105 @@ def benchmark_mutual_info(n_genes, n_samples):
     
     return elapsed, n_pairs
 
-def benchmark_anndata_mutual_info(h5ad_path, max_genes=None):
-    """Benchmark mutual information computation on real gene expression data from h5ad file."""
-    print(f"Loading AnnData from: {h5ad_path}")
+def varying_genes(adata, chunk_size=1000):
+    """
+    Return the indices of genes that are not constant across all samples.
+    
+    Constant genes (e.g. expressed in no cell) have zero mutual information
+    with every other gene, so computing their pairs is wasted work. The
+    per-gene min and max are accumulated over row chunks, which also works on
+    a backed AnnData without loading the whole matrix.
+    """
+    gene_min = np.full(adata.n_vars, np.inf)
+    gene_max = np.full(adata.n_vars, -np.inf)
+    for chunk, _, _ in adata.chunked_X(chunk_size):
+        if sp.issparse(chunk):
+            chunk_min = chunk.min(axis=0).toarray().ravel()
+            chunk_max = chunk.max(axis=0).toarray().ravel()
+        else:
+            chunk_min = np.min(chunk, axis=0)
+            chunk_max = np.max(chunk, axis=0)
+        np.minimum(gene_min, chunk_min, out=gene_min)
+        np.maximum(gene_max, chunk_max, out=gene_max)
+    return np.flatnonzero(gene_max > gene_min)
+
+def load_anndata_matrix(h5ad_path, max_genes=None, log=print):
+    """
+    Load an h5ad file as a (genes × samples) float32 matrix and gene names.
+    
+    Progress lines are passed to `log`, which prints them by default.
+    Returns None if no gene varies across the samples, since there is then
+    nothing to compute.
+    """
+    log(f"Loading AnnData from: {h5ad_path}")
     
-    # Load the AnnData object
+    # Open the AnnData object in backed mode so only the selected genes are read from disk
     start_load = time.time()
-    adata = anndata.read_h5ad(h5ad_path)
+    backed = anndata.read_h5ad(h5ad_path, backed='r')
+    log(f"  Original shape: {backed.shape}")
+    
+    # Skip constant genes before applying the gene limit, so the limit is
+    # not spent on genes whose MI is zero with everything
+    keep = varying_genes(backed)
+    if keep.size < backed.n_vars:
+        log(f"  Skipping {backed.n_vars - keep.size} constant genes")
+    if keep.size == 0:
+        log("  No varying genes; skipping file")
+        backed.file.close()
+        return None
+    
+    # Optionally limit number of genes for faster testing
+    if max_genes and keep.size > max_genes:
+        log(f"  Limiting to first {max_genes} genes for faster testing")
+        keep = keep[:max_genes]
+    adata = backed[:, keep].to_memory()
+    backed.file.close()
     end_load = time.time()
     
-    print(f"  Loaded in {end_load - start_load:.3f} seconds")
-    print(f"  Original shape: {adata.shape}")
+    log(f"  Loaded in {end_load - start_load:.3f} seconds")
     
     # Extract gene expression matrix and gene names
     # AnnData stores data as (n_obs, n_vars) where obs are samples and vars are genes
     # We need to transpose to get (n_genes, n_samples) format
-    if hasattr(adata.X, 'toarray'):
-        # Handle sparse matrix
-        matrix = adata.X.T.toarray()
+    X = adata.X
+    if sp.issparse(X):
+        # Handle sparse matrix: X.T is CSC, whose dense form comes out in
+        # Fortran order; converting to CSR first (a pass over the nonzeros)
+        # lets toarray() write the final C-ordered float32 matrix directly
+        matrix = X.T.tocsr().astype(np.float32, copy=False).toarray()
     else:
         # Handle dense matrix
-        matrix = adata.X.T
+        matrix = np.asarray(X).T
     
     # Ensure the matrix is a proper numpy array with correct dtype and memory layout
-    matrix = np.ascontiguousarray(matrix, dtype=np.float64)
-    genes = list(adata.var_names)
+    # (no copy when the sparse branch already produced one)
+    matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+    # The gene names stay a pandas Index: the MI kernel only needs their
+    # count, and names are looked up by position when results are displayed
+    genes = adata.var_names
     
-    # Optionally limit number of genes for faster testing
-    if max_genes and len(genes) > max_genes:
-        print(f"  Limiting to first {max_genes} genes for faster testing")
-        matrix = matrix[:max_genes]
-        genes = genes[:max_genes]
+    log(f"  Final shape: {matrix.shape} (genes × samples)")
+    log(f"  Gene names: {list(genes[:5])}..." if len(genes) > 5 else f"  Gene names: {list(genes)}")
+    
+    return matrix, genes
+
+def benchmark_anndata_mutual_info(h5ad_path, max_genes=None, data=None):
+    """
+    Benchmark mutual information computation on real gene expression data from h5ad file.
     
-    print(f"  Final shape: {matrix.shape} (genes × samples)")
-    print(f"  Gene names: {genes[:5]}..." if len(genes) > 5 else f"  Gene names: {genes}")
+    `data` is an already loaded (matrix, genes) pair for `h5ad_path`, as
+    returned by load_anndata_matrix; the file is only loaded when it is None.
+    Returns None if the file has no varying genes.
+    """
+    if data is None:
+        data = load_anndata_matrix(h5ad_path, max_genes)
+        if data is None:
+            return None
+    matrix, genes = data
     
     # Time the mutual information computation
     start_time = time.time()
-    result = gene_mutual_info.compute_mutual_information(matrix, genes)
+    result = gvmi.compute_mutual_information(matrix, genes)
     end_time = time.time()
     
     elapsed = end_time - start_time
@@ -80,10 +158,101 @@ def benchmark_anndata_mutual_info(h5ad_path, max_genes=None):
     print(f"  Memory footprint: ~{matrix.nbytes / 1024 / 1024:.1f} MB for input matrix")
     print()
     
-    return elapsed, n_pairs, result
+    return elapsed, n_pairs, result, genes
+
+def benchmark_anndata_files(h5ad_paths, max_genes=None):
+    """
+    Benchmark mutual information over several h5ad files.
+    
+    compute_mutual_information releases the GIL, so the next file is loaded
+    on a background thread while the current one is computed; the total wall
+    time approaches max(load, compute) per file instead of their sum. The
+    loader's progress lines are held back and printed when its file is
+    benchmarked, so they do not interleave with the running benchmark.
+    
+    Yields one benchmark_anndata_mutual_info result per file, so only the
+    current file's MI matrix has to be kept by the caller; files without
+    varying genes are skipped.
+    """
+    def load(h5ad_path):
+        lines = []
+        data = load_anndata_matrix(h5ad_path, max_genes, log=lines.append)
+        return data, lines
+    
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        next_load = executor.submit(load, h5ad_paths[0]) if h5ad_paths else None
+        for i, h5ad_path in enumerate(h5ad_paths):
+            data, lines = next_load.result()
+            if i + 1 < len(h5ad_paths):
+                next_load = executor.submit(load, h5ad_paths[i + 1])
+            for line in lines:
+                print(line)
+            if data is None:
+                print()
+                continue
+            yield benchmark_anndata_mutual_info(h5ad_path, max_genes, data=data)
+
+def summarize_pairs(mi_matrix, top_k=5):
+    """
+    Summarize the cross-gene pairs of a symmetric MI matrix.
+    
+    The statistics come from one pass over the upper triangle, read in place
+    by triangle_statistics. The top pairs are then found one row at a time,
+    so only a row's candidates and the running top `top_k` are held beyond
+    the matrix itself.
+    
+    Returns:
+        stats: (count, sum, min, max) over the off-diagonal values
+        top_pairs: list of (row, col, mi_value) for the top pairs, highest first
+    """
+    n_genes = mi_matrix.shape[0]
+    _, stats = gvmi.triangle_statistics(mi_matrix, n_genes)
+    
+    # Candidates are tracked by their flat index into the matrix
+    top_index = np.empty(0, dtype=np.int64)
+    top_values = np.empty(0, dtype=mi_matrix.dtype)
+    if top_k > 0:
+        for i in range(n_genes - 1):
+            top_index, top_values = merge_top(
+                top_index, top_values, mi_matrix[i, i + 1:], i * n_genes + i + 1, top_k
+            )
+    
+    order = np.argsort(-top_values)
+    rows, cols = np.divmod(top_index[order], n_genes)
+    top_pairs = list(zip(rows, cols, top_values[order]))
+    return stats, top_pairs
 
 def main():
     """Run benchmarks with different matrix sizes."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark gene mutual information on synthetic data and h5ad files",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Synthetic benchmarks only
+  python benchmark.py
+  
+  # Also benchmark two h5ad files, the second loaded while the first computes
+  python benchmark.py data1.h5ad data2.h5ad --max-genes 2000
+        """
+    )
+    
+    parser.add_argument(
+        'h5ad_paths',
+        nargs='*',
+        help='h5ad files to benchmark after the synthetic cases'
+    )
+    
+    parser.add_argument(
+        '--max-genes',
+        type=int,
+        default=5000,
+        help='Maximum number of varying genes per h5ad file (default: 5000); '
+             'the dense float64 result takes 8 * N^2 bytes'
+    )
+    
+    args = parser.parse_args()
+    
     print("Gene Mutual Information Performance Benchmark")
     print("=" * 50)
     print()
@@ -98,8 +267,18 @@ def main():
     total_time = 0
     total_pairs = 0
     
+    # One random matrix covering every case; each case uses a slice of it
+    buffer = rng.standard_normal(
+        (max(n_genes for n_genes, _ in test_cases), max(n_samples for _, n_samples in test_cases)),
+        dtype=np.float32,
+    )
+    
+    # Warm up the thread pool and allocator so the first timed case does not
+    # pay for them
+    gvmi.compute_mutual_information(buffer[:2, :2], ["WARMUP_0", "WARMUP_1"])
+    
     for n_genes, n_samples in test_cases:
-        elapsed, n_pairs = benchmark_mutual_info(n_genes, n_samples)
+        elapsed, n_pairs = benchmark_mutual_info(n_genes, n_samples, buffer)
         total_time += elapsed
         total_pairs += n_pairs
     
@@ -109,26 +288,31 @@ def main():
     print("      and linearly with number of samples.")
     print()
     
-    # Example of using AnnData h5ad file (uncomment and provide path)
+    # AnnData h5ad files given on the command line; each file after the first
+    # is loaded while the previous one is computed
+    h5ad_paths = []
+    for h5ad_path in args.h5ad_paths:
+        if Path(h5ad_path).exists():
+            h5ad_paths.append(h5ad_path)
+        else:
+            print(f"Skipping missing h5ad file: {h5ad_path}")
+    if not h5ad_paths:
+        return
+    
     print("=" * 50)
-    print("AnnData h5ad file benchmark example:")
-    print("(Uncomment the following lines and provide a valid h5ad file path)")
-    
-    # Example usage:
-    elapsed, n_pairs, mi_dict = benchmark_anndata_mutual_info("/Users/ceglian/Data/tcri/smith_chkpt.h5ad", max_genes=100000)
-    
-    # Extract all pairwise MI values (excluding self-comparisons)
-    all_pairs = []
-    for gene1 in mi_dict:
-        for gene2 in mi_dict[gene1]:
-            if gene1 != gene2:  # Skip diagonal (self-MI)
-                all_pairs.append(((gene1, gene2), mi_dict[gene1][gene2]))
-    
-    # Sort by MI value and show top 5
-    sorted_pairs = sorted(all_pairs, key=lambda x: x[1], reverse=True)[:5]
-    print(f"Top 5 mutual information pairs (excluding self-comparisons):")
-    for (gene1, gene2), mi_value in sorted_pairs:
-        print(f"  {gene1} - {gene2}: {mi_value:.4f}")
+    print("AnnData h5ad file benchmark:")
+    print()
+    
+    for elapsed, n_pairs, mi_matrix, genes in benchmark_anndata_files(h5ad_paths, max_genes=args.max_genes):
+        # Summarize pairwise MI values from the upper triangle (excluding self-comparisons)
+        (count, total, minimum, maximum), top_pairs = summarize_pairs(mi_matrix, top_k=5)
+        
+        if count:
+            print(f"Cross-gene MI: mean {total / count:.4f}, min {minimum:.4f}, max {maximum:.4f}")
+            print(f"Top {len(top_pairs)} mutual information pairs (excluding self-comparisons):")
+            for i, j, mi_value in top_pairs:
+                print(f"  {genes[i]} - {genes[j]}: {mi_value:.4f}")
+            print()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,54 @@
+"""
+Helpers shared by the gvmi scripts (benchmark.py, inspect_pickle.py,
+test_example.py).
+
+Only numpy is needed, so these can be used without the compiled extension.
+"""
+
+import numpy as np
+
+
+def triangle_row_offsets(n_genes, k=0):
+    """
+    Start position of each row in a row-major packed upper triangle.
+    
+    With k=0 the triangle includes the diagonal; with k=1 it does not, which
+    matches the order of np.triu_indices(n_genes, k=1).
+    """
+    rows = np.arange(n_genes, dtype=np.int64)
+    return rows * (n_genes - k) - rows * (rows - 1) // 2
+
+
+def triangle_pairs(flat_idx, n_genes, k=0):
+    """
+    Map positions in a packed upper triangle back to (row, col) gene indices.
+    
+    Only the O(n_genes) row offsets are built, so this stays cheap where
+    np.triu_indices would allocate two index arrays of n_genes^2 / 2 entries.
+    """
+    offsets = triangle_row_offsets(n_genes, k)
+    rows = np.searchsorted(offsets, flat_idx, side='right') - 1
+    cols = flat_idx - offsets[rows] + rows + k
+    return rows, cols
+
+
+def merge_top(top_index, top_values, values, offset, k, n_candidates=None):
+    """
+    Merge a block of values into a running top-`k` selection.
+    
+    `values` holds the candidates at positions `offset`, `offset + 1`, ...;
+    only the block's own best `n_candidates` (default `k`) are merged with
+    the running `top_index` / `top_values`, which are then cut back to `k`
+    entries. The returned selection is unordered.
+    """
+    n_candidates = min(k if n_candidates is None else n_candidates, values.size)
+    if n_candidates <= 0:
+        return top_index, top_values
+    
+    local = np.argpartition(values, values.size - n_candidates)[-n_candidates:]
+    top_index = np.concatenate([top_index, offset + local])
+    top_values = np.concatenate([top_values, values[local]])
+    if top_values.size > k:
+        keep = np.argpartition(top_values, top_values.size - k)[-k:]
+        top_index, top_values = top_index[keep], top_values[keep]
+    return top_index, top_values
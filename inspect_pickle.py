@@ -1,34 +1,166 @@
 #!/usr/bin/env python3
 """
-Utility script to inspect pickle files created by gvmi
+Utility script to inspect result files created by gvmi
 (GeneVector Mutual Information)
 """
 
 import argparse
+import json
 import pickle
 import sys
 from pathlib import Path
 
+import numpy as np
+
+# The compiled extension only speeds up the statistics pass; results can be
+# inspected without it
+try:
+    import gvmi
+except ImportError:
+    gvmi = None
+
+from gvmi_utils import merge_top, triangle_pairs, triangle_row_offsets
+
+# Number of packed MI values read from disk per chunk while scanning a result
+CHUNK_SIZE = 1 << 20
+
+
+def as_upper_triangle(mi_data, genes):
+    """
+    Return the mutual information result as a packed upper triangle.
+    
+    The result is a 1-D array of length n_genes * (n_genes + 1) / 2 holding
+    row i from column i onwards, for each row in turn (diagonal included).
+    Pickles written by older gvmi versions store either the dense
+    (n_genes, n_genes) matrix or a nested dict {gene1: {gene2: mi_value}};
+    these are converted once on load.
+    """
+    if isinstance(mi_data, dict):
+        index = {gene: i for i, gene in enumerate(genes)}
+        matrix = np.zeros((len(genes), len(genes)), dtype=np.float64)
+        for gene1, row in mi_data.items():
+            for gene2, mi_value in row.items():
+                matrix[index[gene1], index[gene2]] = mi_value
+        mi_data = matrix
+    
+    mi_data = np.asarray(mi_data)
+    if mi_data.ndim == 1:
+        return mi_data
+    
+    packed = np.empty(len(genes) * (len(genes) + 1) // 2, dtype=mi_data.dtype)
+    for i, start in enumerate(triangle_row_offsets(len(genes))):
+        packed[start:start + len(genes) - i] = mi_data[i, i:]
+    return packed
+
+
+def top_pairs(mi_values, n_genes, show_top, chunk_size=CHUNK_SIZE):
+    """
+    Find the highest cross-gene values of a packed upper triangle.
+    
+    The values are read in chunks, so a memory-mapped result is never loaded
+    as a whole; only one chunk and the running top `show_top` candidates are
+    held in memory at a time.
+    
+    Returns:
+        top_positions: packed positions of the top pairs, highest MI first
+        top_values: MI values of the top pairs
+    """
+    diagonal_positions = triangle_row_offsets(n_genes)
+    top_positions = np.empty(0, dtype=np.int64)
+    top_values = np.empty(0, dtype=mi_values.dtype)
+    
+    for start in range(0, mi_values.size, chunk_size):
+        chunk = np.array(mi_values[start:start + chunk_size])
+        lo, hi = np.searchsorted(diagonal_positions, [start, start + chunk.size])
+        diagonal = diagonal_positions[lo:hi] - start
+        
+        # Best cross-gene candidates of this chunk, merged with the running
+        # top; the masked diagonal is never among them
+        chunk[diagonal] = -np.inf
+        top_positions, top_values = merge_top(
+            top_positions, top_values, chunk, start, show_top,
+            n_candidates=chunk.size - diagonal.size,
+        )
+    
+    order = np.argsort(-top_values)
+    return top_positions[order], top_values[order]
+
+
+def triangle_statistics(mi_values, n_genes, chunk_size=CHUNK_SIZE):
+    """
+    Summarize the diagonal and the cross-gene values of a packed triangle.
+    
+    Returns `(count, sum, min, max)` for each, like gvmi.triangle_statistics,
+    which is used when the extension is installed. Otherwise the values are
+    read in chunks with numpy, so a memory-mapped result is still never
+    loaded as a whole.
+    """
+    if gvmi is not None:
+        return gvmi.triangle_statistics(mi_values, n_genes)
+    
+    expected = n_genes * (n_genes + 1) // 2
+    if mi_values.size != expected:
+        raise ValueError(
+            f"Packed triangle has {mi_values.size} values, expected {expected} for {n_genes} genes"
+        )
+    
+    diagonal_positions = triangle_row_offsets(n_genes)
+    summaries = [[0, 0.0, np.inf, -np.inf], [0, 0.0, np.inf, -np.inf]]
+    for start in range(0, mi_values.size, chunk_size):
+        chunk = np.asarray(mi_values[start:start + chunk_size])
+        lo, hi = np.searchsorted(diagonal_positions, [start, start + chunk.size])
+        on_diagonal = np.zeros(chunk.size, dtype=bool)
+        on_diagonal[diagonal_positions[lo:hi] - start] = True
+        
+        for summary, values in zip(summaries, (chunk[on_diagonal], chunk[~on_diagonal])):
+            if values.size:
+                summary[0] += values.size
+                summary[1] += float(values.sum(dtype=np.float64))
+                summary[2] = min(summary[2], float(values.min()))
+                summary[3] = max(summary[3], float(values.max()))
+    return tuple(tuple(summary) for summary in summaries)
+
+
+def load_results(result_path):
+    """
+    Load a gvmi result as a dict with the same keys as the legacy pickle.
+    
+    `.npy` results are memory-mapped rather than read into RAM, with the gene
+    list and run information read from the `.genes.json` / `.meta.json`
+    files next to them. Anything else is treated as a legacy pickle.
+    """
+    result_path = Path(result_path)
+    if result_path.suffix != '.npy':
+        with open(result_path, 'rb') as f:
+            return pickle.load(f)
+    
+    with open(result_path.with_suffix('.genes.json')) as f:
+        genes = json.load(f)
+    with open(result_path.with_suffix('.meta.json')) as f:
+        data = json.load(f)
+    data['genes'] = genes
+    data['mutual_information'] = np.load(result_path, mmap_mode='r')
+    return data
+
 
 def inspect_pickle(pickle_path, show_top=10, show_genes=False, detailed=False):
     """
-    Inspect the contents of a mutual information pickle file.
+    Inspect the contents of a mutual information result file.
     
     Args:
-        pickle_path: Path to the pickle file
+        pickle_path: Path to the .npy result file (or a legacy pickle file)
         show_top: Number of top MI pairs to show
         show_genes: Whether to show the gene list
         detailed: Whether to show detailed metadata
     """
     try:
-        with open(pickle_path, 'rb') as f:
-            data = pickle.load(f)
+        data = load_results(pickle_path)
     except Exception as e:
-        print(f"Error loading pickle file: {e}")
+        print(f"Error loading result file: {e}")
         sys.exit(1)
     
     print("=" * 60)
-    print(f"Pickle File Inspection: {pickle_path}")
+    print(f"Result File Inspection: {pickle_path}")
     print("=" * 60)
     
     # Basic information
@@ -43,9 +175,10 @@ def inspect_pickle(pickle_path, show_top=10, show_genes=False, detailed=False):
     print(f"File size: {file_size:.2f} MB")
     print()
     
-    # Extract MI dictionary
-    mi_dict = data['mutual_information']
+    # Extract MI values as a packed upper triangle
     genes = data['genes']
+    n_genes = len(genes)
+    mi_values = as_upper_triangle(data['mutual_information'], genes)
     
     # Show gene list if requested
     if show_genes:
@@ -54,41 +187,37 @@ def inspect_pickle(pickle_path, show_top=10, show_genes=False, detailed=False):
             print(f"  {i+1:3d}. {gene}")
         print()
     
-    # Extract all pairwise MI values (excluding self-comparisons)
-    all_pairs = []
-    diagonal_values = []
-    
-    for gene1 in mi_dict:
-        for gene2 in mi_dict[gene1]:
-            if gene1 == gene2:
-                diagonal_values.append(mi_dict[gene1][gene2])
-            else:
-                # Only add each pair once (avoid duplicates)
-                if gene1 < gene2:  # Lexicographic ordering to avoid duplicates
-                    all_pairs.append(((gene1, gene2), mi_dict[gene1][gene2]))
+    # Diagonal (self-MI) sits at the start of each row; the rest are the
+    # cross-gene pairs, each stored once. Both are summarized in a single
+    # pass over the (possibly memory-mapped) values.
+    diagonal_stats, pair_stats = triangle_statistics(mi_values, n_genes)
     
     print(f"Self-mutual information (diagonal) statistics:")
-    if diagonal_values:
-        print(f"  Mean: {sum(diagonal_values) / len(diagonal_values):.4f}")
-        print(f"  Min:  {min(diagonal_values):.4f}")
-        print(f"  Max:  {max(diagonal_values):.4f}")
+    n_diagonal, diagonal_sum, diagonal_min, diagonal_max = diagonal_stats
+    if n_diagonal:
+        print(f"  Mean: {diagonal_sum / n_diagonal:.4f}")
+        print(f"  Min:  {diagonal_min:.4f}")
+        print(f"  Max:  {diagonal_max:.4f}")
     print()
     
     print(f"Cross-gene mutual information statistics:")
-    if all_pairs:
-        mi_values = [mi for _, mi in all_pairs]
-        print(f"  Mean: {sum(mi_values) / len(mi_values):.4f}")
-        print(f"  Min:  {min(mi_values):.4f}")
-        print(f"  Max:  {max(mi_values):.4f}")
+    n_pairs, pair_sum, pair_min, pair_max = pair_stats
+    if n_pairs:
+        print(f"  Mean: {pair_sum / n_pairs:.4f}")
+        print(f"  Min:  {pair_min:.4f}")
+        print(f"  Max:  {pair_max:.4f}")
     print()
     
-    # Show top pairs
-    if all_pairs and show_top > 0:
-        sorted_pairs = sorted(all_pairs, key=lambda x: x[1], reverse=True)
-        print(f"Top {min(show_top, len(sorted_pairs))} mutual information pairs:")
-        for i, ((gene1, gene2), mi_value) in enumerate(sorted_pairs[:show_top], 1):
-            print(f"  {i:2d}. {gene1} - {gene2}: {mi_value:.6f}")
-        print()
+    # Show top pairs; with --top 0 the values are only read once, for the
+    # statistics above
+    if show_top > 0:
+        top_positions, top_values = top_pairs(mi_values, n_genes, show_top)
+        if top_values.size:
+            rows, cols = triangle_pairs(top_positions, n_genes)
+            print(f"Top {top_values.size} mutual information pairs:")
+            for i, (mi_value, row, col) in enumerate(zip(top_values, rows, cols), 1):
+                print(f"  {i:2d}. {genes[row]} - {genes[col]}: {mi_value:.6f}")
+            print()
     
     # Show detailed metadata if requested
     if detailed and 'metadata' in data:
@@ -99,36 +228,34 @@ def inspect_pickle(pickle_path, show_top=10, show_genes=False, detailed=False):
         print()
     
     print("Data structure:")
-    print("  data['mutual_information'] -> nested dict {gene1: {gene2: mi_value}}")
-    print("  data['genes'] -> list of gene names")
-    print("  data['computation_time'] -> float (seconds)")
-    print("  data['n_genes'] -> int")
-    print("  data['n_pairs'] -> int")
-    print("  data['timestamp'] -> str")
-    print("  data['metadata'] -> dict with preprocessing info")
+    print("  <name>.npy        -> float32 1-D array, packed upper triangle (with diagonal) of the")
+    print("                       symmetric MI matrix, rows/cols ordered as the gene list")
+    print("  <name>.genes.json -> list of gene names")
+    print("  <name>.meta.json  -> n_genes, n_pairs, computation_time (seconds), timestamp,")
+    print("                       metadata (dict with preprocessing info)")
     
 
 def main():
-    """Main function for pickle inspection."""
+    """Main function for result inspection."""
     parser = argparse.ArgumentParser(
-        description="Inspect mutual information pickle files created by gvmi",
+        description="Inspect mutual information result files created by gvmi",
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog="""
 Examples:
   # Basic inspection
-  python inspect_pickle.py results.pkl
+  python inspect_pickle.py results.npy
   
   # Show top 20 pairs and gene list
-  python inspect_pickle.py results.pkl --top 20 --show-genes
+  python inspect_pickle.py results.npy --top 20 --show-genes
   
   # Detailed inspection with metadata
-  python inspect_pickle.py results.pkl --detailed
+  python inspect_pickle.py results.npy --detailed
         """
     )
     
     parser.add_argument(
-        'pickle_file',
-        help='Path to pickle file to inspect'
+        'result_file',
+        help='Path to .npy result file (or legacy pickle file) to inspect'
     )
     
     parser.add_argument(
@@ -153,13 +280,13 @@ Examples:
     args = parser.parse_args()
     
     # Validate input file
-    pickle_path = Path(args.pickle_file)
-    if not pickle_path.exists():
-        print(f"Error: Pickle file does not exist: {pickle_path}")
+    result_path = Path(args.result_file)
+    if not result_path.exists():
+        print(f"Error: Result file does not exist: {result_path}")
         sys.exit(1)
     
     inspect_pickle(
-        pickle_path,
+        result_path,
         show_top=args.top,
         show_genes=args.show_genes,
         detailed=args.detailed
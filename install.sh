@@ -87,4 +87,4 @@ echo ""
 echo "Installation complete!"
 echo ""
 echo "Quick start:"
-echo "  gvmi input.h5ad -o results.pkl --max-genes 100"
+echo "  gvmi input.h5ad -o results.npy --max-genes 100"
@@ -1,11 +1,12 @@
 use pyo3::prelude::*;
-use pyo3::types::{PyDict, PyList};
-use numpy::PyReadonlyArray2;
+use pyo3::types::{PyDict, PyList, PyString};
+use numpy::{IntoPyArray, PyArray2, PyArrayMethods, PyReadonlyArray1, PyReadonlyArray2, PyUntypedArrayMethods};
+use ndarray::{s, Array2, ArrayView1, ArrayView2};
 use rayon::prelude::*;
 use std::collections::HashMap;
+use std::sync::OnceLock;
 use thiserror::Error;
 use indicatif::{ProgressBar, ProgressStyle};
-use std::sync::Mutex;
 
 #[derive(Error, Debug)]
 pub enum MutualInfoError {
@@ -13,52 +14,71 @@ pub enum MutualInfoError {
     DimensionMismatch { matrix_rows: usize, gene_count: usize },
     #[error("Empty input: matrix or gene list is empty")]
     EmptyInput,
+    #[error("Mutual information matrix must be square: got {rows} x {cols}")]
+    NotSquare { rows: usize, cols: usize },
+    #[error("Unknown gene: {0}")]
+    UnknownGene(String),
+    #[error("Packed triangle has {length} values, expected {expected} for {n_genes} genes")]
+    TriangleLength { length: usize, expected: usize, n_genes: usize },
 }
 
 impl std::convert::From<MutualInfoError> for PyErr {
     fn from(err: MutualInfoError) -> PyErr {
-        PyErr::new::<pyo3::exceptions::PyValueError, _>(err.to_string())
+        match err {
+            MutualInfoError::UnknownGene(gene) => {
+                PyErr::new::<pyo3::exceptions::PyKeyError, _>(gene)
+            }
+            _ => PyErr::new::<pyo3::exceptions::PyValueError, _>(err.to_string()),
+        }
     }
 }
 
-/// Compute mutual information between two discrete random variables
-fn mutual_information(x: &[f64], y: &[f64]) -> f64 {
-    let n = x.len();
+/// Number of quantile bins used to discretize each gene
+const N_BINS: usize = 10;
+
+// Bin codes are stored as 4-bit nibbles, two samples per byte
+const _: () = assert!(N_BINS <= 16);
+
+/// Compute mutual information between two discretized genes
+///
+/// `x` and `y` hold the nibble-packed bin codes of `n_samples` samples and
+/// `x_counts` / `y_counts` their precomputed marginal bin counts. The joint
+/// distribution is accumulated in a flat `N_BINS * N_BINS` histogram indexed
+/// by `N_BINS * x + y`, so each pair costs one branch-free pass over the
+/// packed bytes.
+fn mutual_information(
+    x: &[u8],
+    y: &[u8],
+    n_samples: usize,
+    x_counts: &[u32; N_BINS],
+    y_counts: &[u32; N_BINS],
+) -> f64 {
+    let n = n_samples;
     if n == 0 { return 0.0; }
     
-    // Create joint and marginal frequency maps
-    let mut joint_freq: HashMap<(i32, i32), usize> = HashMap::new();
-    let mut x_freq: HashMap<i32, usize> = HashMap::new();
-    let mut y_freq: HashMap<i32, usize> = HashMap::new();
-    
-    // Discretize continuous values using simple binning
-    // For gene expression data, we'll use quantile-based binning
-    let mut x_sorted = x.to_vec();
-    let mut y_sorted = y.to_vec();
-    x_sorted.sort_by(|a, b| a.partial_cmp(b).unwrap());
-    y_sorted.sort_by(|a, b| a.partial_cmp(b).unwrap());
-    
-    let bins = 10; // Number of bins for discretization
-    
-    for i in 0..n {
-        let x_bin = discretize_value(x[i], &x_sorted, bins);
-        let y_bin = discretize_value(y[i], &y_sorted, bins);
-        
-        *joint_freq.entry((x_bin, y_bin)).or_insert(0) += 1;
-        *x_freq.entry(x_bin).or_insert(0) += 1;
-        *y_freq.entry(y_bin).or_insert(0) += 1;
+    let mut joint = [0u32; N_BINS * N_BINS];
+    for (&x_byte, &y_byte) in x.iter().zip(y.iter()) {
+        joint[N_BINS * (x_byte & 0xF) as usize + (y_byte & 0xF) as usize] += 1;
+        joint[N_BINS * (x_byte >> 4) as usize + (y_byte >> 4) as usize] += 1;
     }
+    // With an odd sample count the unused high nibble of the last byte is
+    // zero in both genes and was counted as a (0, 0) sample
+    joint[0] -= (2 * x.len() - n) as u32;
     
     // Calculate mutual information
     let mut mi = 0.0;
     let n_f = n as f64;
     
-    for (&(x_val, y_val), &joint_count) in &joint_freq {
-        let p_xy = joint_count as f64 / n_f;
-        let p_x = x_freq[&x_val] as f64 / n_f;
-        let p_y = y_freq[&y_val] as f64 / n_f;
+    for x_bin in 0..N_BINS {
+        if x_counts[x_bin] == 0 { continue; }
+        let p_x = x_counts[x_bin] as f64 / n_f;
         
-        if p_xy > 0.0 && p_x > 0.0 && p_y > 0.0 {
+        for y_bin in 0..N_BINS {
+            let joint_count = joint[N_BINS * x_bin + y_bin];
+            if joint_count == 0 { continue; }
+            
+            let p_xy = joint_count as f64 / n_f;
+            let p_y = y_counts[y_bin] as f64 / n_f;
             mi += p_xy * (p_xy / (p_x * p_y)).ln();
         }
     }
@@ -66,49 +86,154 @@ fn mutual_information(x: &[f64], y: &[f64]) -> f64 {
     mi
 }
 
-/// Discretize a continuous value based on quantiles
-fn discretize_value(value: f64, sorted_values: &[f64], bins: usize) -> i32 {
-    let n = sorted_values.len();
-    if n == 0 { return 0; }
+/// Compute the entropy of a discretized gene from its marginal bin counts
+///
+/// This is the self-mutual information `MI(X, X)`, which only needs the
+/// marginal distribution rather than a pass over the samples.
+fn entropy(counts: &[u32; N_BINS], n_samples: usize) -> f64 {
+    let n_f = n_samples as f64;
+    counts
+        .iter()
+        .filter(|&&count| count > 0)
+        .map(|&count| {
+            let p = count as f64 / n_f;
+            -p * p.ln()
+        })
+        .sum()
+}
+
+/// Number of interior quantile edges per gene
+const N_EDGES: usize = N_BINS - 1;
+
+/// Compute the interior quantile edges of one gene
+///
+/// Edge `k` is the value at sorted position `(k + 1) * n / N_BINS`.
+/// Expression values only need to be ordered for binning, so `f32` input is
+/// as accurate as `f64`.
+fn quantile_edges<T: PartialOrd + Copy>(values: ArrayView1<'_, T>) -> [T; N_EDGES] {
+    let mut sorted = values.to_vec();
+    sorted.sort_by(|a, b| a.partial_cmp(b).unwrap());
     
-    for i in 1..bins {
-        let quantile_idx = (i * n) / bins;
-        if quantile_idx < n && value <= sorted_values[quantile_idx] {
-            return (i - 1) as i32;
-        }
+    let n = sorted.len();
+    std::array::from_fn(|k| sorted[((k + 1) * n) / N_BINS])
+}
+
+/// Bin code of a value: the number of quantile edges strictly below it
+///
+/// Equivalent to a lower-bound search over the sorted edges, but written as
+/// independent compare-and-add steps so it compiles without branches.
+#[inline]
+fn bin_index<T: PartialOrd + Copy>(value: T, edges: &[T; N_EDGES]) -> u8 {
+    edges.iter().map(|&edge| (edge < value) as u8).sum()
+}
+
+/// Count the number of samples in each bin from nibble-packed bin codes
+fn bin_counts(codes: &[u8], n_samples: usize) -> [u32; N_BINS] {
+    let mut counts = [0u32; N_BINS];
+    for &byte in codes {
+        counts[(byte & 0xF) as usize] += 1;
+        counts[(byte >> 4) as usize] += 1;
     }
-    (bins - 1) as i32
+    // Discount the zero padding nibble of an odd sample count
+    counts[0] -= (2 * codes.len() - n_samples) as u32;
+    counts
 }
 
-/// Compute pairwise mutual information for all gene pairs in a matrix
-#[pyfunction]
-fn compute_mutual_information(
-    py: Python<'_>,
-    matrix: PyReadonlyArray2<f64>,
-    genes: &Bound<'_, PyList>,
-) -> PyResult<PyObject> {
-    let matrix = matrix.as_array();
-    let gene_names: Vec<String> = genes
-        .iter()
-        .map(|item| item.extract::<String>())
-        .collect::<Result<Vec<_>, _>>()?;
-    
+/// Map a position in the packed lower triangle to its (row, col) gene pair
+///
+/// Pairs are enumerated row by row with `col <= row`, so row `i` occupies
+/// positions `i * (i + 1) / 2 ..= i * (i + 1) / 2 + i` and the diagonal is
+/// included.
+fn triangle_pair(p: usize) -> (usize, usize) {
+    let mut i = ((((8 * p + 1) as f64).sqrt() as usize) - 1) / 2;
+    // Correct for rounding in the floating-point square root
+    while i * (i + 1) / 2 > p { i -= 1; }
+    while (i + 1) * (i + 2) / 2 <= p { i += 1; }
+    (i, p - i * (i + 1) / 2)
+}
+
+/// Cache budget for the bin codes of the two gene blocks of one tile
+const TILE_CACHE_BYTES: usize = 256 * 1024;
+
+/// Upper bound on the number of genes per tile edge
+const MAX_TILE_GENES: usize = 64;
+
+/// Gene pairs `(i, j)` with `j <= i` covered by tile `(ti, tj)`, row by row
+fn tile_pairs(
+    ti: usize,
+    tj: usize,
+    tile: usize,
+    n_genes: usize,
+) -> impl Iterator<Item = (usize, usize)> {
+    let rows = ti * tile..((ti + 1) * tile).min(n_genes);
+    rows.flat_map(move |i| (tj * tile..((tj + 1) * tile).min(i + 1)).map(move |j| (i, j)))
+}
+
+/// Compute the symmetric mutual information matrix for all gene pairs
+fn mutual_information_matrix<T: PartialOrd + Copy + Send + Sync>(
+    matrix: ArrayView2<'_, T>,
+    n_genes: usize,
+) -> Result<Array2<f64>, MutualInfoError> {
     // Validate input dimensions
-    if matrix.nrows() != gene_names.len() {
+    if matrix.nrows() != n_genes {
         return Err(MutualInfoError::DimensionMismatch {
             matrix_rows: matrix.nrows(),
-            gene_count: gene_names.len(),
-        }.into());
+            gene_count: n_genes,
+        });
     }
     
     if matrix.nrows() == 0 || matrix.ncols() == 0 {
-        return Err(MutualInfoError::EmptyInput.into());
+        return Err(MutualInfoError::EmptyInput);
     }
     
-    let n_genes = gene_names.len();
+    // Discretize every gene once, rather than once per pair it appears in:
+    // first a contiguous (n_genes, N_EDGES) table of quantile edges, then a
+    // single pass over the matrix mapping each value to its bin code. Codes
+    // are packed two per byte (sample `2k` in the low nibble, `2k + 1` in the
+    // high one), halving the bytes read per pair.
+    let n_samples = matrix.ncols();
+    let packed_len = n_samples.div_ceil(2);
+    let edges: Vec<[T; N_EDGES]> = (0..n_genes)
+        .into_par_iter()
+        .map(|g| quantile_edges(matrix.row(g)))
+        .collect();
+    
+    let mut codes = vec![0u8; n_genes * packed_len];
+    codes
+        .par_chunks_mut(packed_len)
+        .enumerate()
+        .for_each(|(g, gene_codes)| {
+            let gene_edges = &edges[g];
+            for (s, &value) in matrix.row(g).iter().enumerate() {
+                gene_codes[s / 2] |= bin_index(value, gene_edges) << (4 * (s % 2));
+            }
+        });
+    let gene_codes = |g: usize| &codes[g * packed_len..(g + 1) * packed_len];
+    
+    // Genes with identical bin codes (e.g. the many all-zero genes in sparse
+    // single-cell data) have identical MI with every other gene, so MI is only
+    // computed between distinct code vectors and then scattered back. Padding
+    // nibbles are always zero, so comparing packed rows compares codes.
+    let mut unique_index: HashMap<&[u8], usize> = HashMap::new();
+    let mut representatives: Vec<usize> = Vec::new();
+    let gene_unique: Vec<usize> = (0..n_genes)
+        .map(|g| {
+            *unique_index.entry(gene_codes(g)).or_insert_with(|| {
+                representatives.push(g);
+                representatives.len() - 1
+            })
+        })
+        .collect();
+    let n_unique = representatives.len();
+    
+    let counts: Vec<[u32; N_BINS]> = representatives
+        .par_iter()
+        .map(|&g| bin_counts(gene_codes(g), n_samples))
+        .collect();
+    let unique_codes = |u: usize| gene_codes(representatives[u]);
     
     // Create progress bar
-    let total_pairs = (n_genes * (n_genes + 1)) / 2; // Including diagonal
+    let total_pairs = (n_unique * (n_unique + 1)) / 2; // Including diagonal
     let progress_bar = ProgressBar::new(total_pairs as u64);
     progress_bar.set_style(
         ProgressStyle::default_bar()
@@ -118,67 +243,403 @@ fn compute_mutual_information(
     );
     progress_bar.set_message("Computing mutual information...");
     
-    // Create result dictionary
-    let result = PyDict::new(py);
+    // Compute mutual information tile by tile: each tile pairs a block of
+    // `tile` genes with another, sized so both blocks of codes stay in cache
+    // while every pair between them is computed. Tiles are enumerated as one
+    // flat triangle and processed in parallel.
+    let tile = (TILE_CACHE_BYTES / (2 * packed_len)).clamp(1, MAX_TILE_GENES);
+    let n_tiles = n_unique.div_ceil(tile);
+    let n_tile_pairs = n_tiles * (n_tiles + 1) / 2;
     
-    // Compute mutual information for all pairs in parallel
-    let gene_pairs: Vec<(usize, usize)> = (0..n_genes)
-        .flat_map(|i| (i..n_genes).map(move |j| (i, j)))
+    let tile_results: Vec<Vec<f64>> = (0..n_tile_pairs)
+        .into_par_iter()
+        .map(|t| {
+            let (ti, tj) = triangle_pair(t);
+            let values: Vec<f64> = tile_pairs(ti, tj, tile, n_unique)
+                // The self-mutual information on the diagonal is the entropy,
+                // computed from the marginal counts alone
+                .map(|(i, j)| if i == j {
+                    entropy(&counts[i], n_samples)
+                } else {
+                    mutual_information(unique_codes(i), unique_codes(j), n_samples, &counts[i], &counts[j])
+                })
+                .collect();
+            progress_bar.inc(values.len() as u64);
+            values
+        })
         .collect();
     
-    let progress_counter = Mutex::new(0);
-    let mi_results: Vec<((usize, usize), f64)> = gene_pairs
-        .par_iter()
-        .map(|&(i, j)| {
-            let row_i = matrix.row(i);
-            let row_j = matrix.row(j);
-            let mi = if i == j {
-                // Self-mutual information (entropy)
-                mutual_information(row_i.as_slice().unwrap(), row_i.as_slice().unwrap())
-            } else {
-                mutual_information(row_i.as_slice().unwrap(), row_j.as_slice().unwrap())
-            };
-            
-            // Update progress bar
-            {
-                let mut counter = progress_counter.lock().unwrap();
-                *counter += 1;
-                progress_bar.set_position(*counter as u64);
+    progress_bar.finish_with_message("Mutual information computation completed!");
+    
+    // Assemble the symmetric result, writing each distinct pair straight to
+    // every gene that shares its code vectors. Without duplicates each list
+    // holds only the gene itself, so this is a plain fill of one matrix.
+    let mut members: Vec<Vec<usize>> = vec![Vec::new(); n_unique];
+    for (g, &u) in gene_unique.iter().enumerate() {
+        members[u].push(g);
+    }
+    
+    let mut result = Array2::<f64>::zeros((n_genes, n_genes));
+    for (t, values) in tile_results.into_iter().enumerate() {
+        let (ti, tj) = triangle_pair(t);
+        for ((i, j), mi_value) in tile_pairs(ti, tj, tile, n_unique).zip(values) {
+            for &gene_i in &members[i] {
+                for &gene_j in &members[j] {
+                    result[[gene_i, gene_j]] = mi_value;
+                    result[[gene_j, gene_i]] = mi_value;
+                }
             }
-            
-            ((i, j), mi)
+        }
+    }
+    
+    Ok(result)
+}
+
+/// Number of gene names in `genes`, which may be any sized sequence but not a
+/// single string
+fn gene_count(genes: &Bound<'_, PyAny>) -> PyResult<usize> {
+    if genes.is_instance_of::<PyString>() {
+        return Err(pyo3::exceptions::PyTypeError::new_err(
+            "genes must be a sequence of gene names, not a string",
+        ));
+    }
+    genes.len()
+}
+
+/// Compute pairwise mutual information for all gene pairs in a matrix.
+///
+/// Accepts a float32 or float64 (n_genes, n_samples) matrix; float32 halves
+/// the memory traffic of the binning pass. Returns a dense symmetric
+/// (n_genes, n_genes) float64 array whose rows and columns follow the order
+/// of `genes`; the diagonal holds self-MI (entropy).
+///
+/// `genes` may be any sized sequence of gene names (a list, a pandas Index,
+/// ...); only its length is checked, so the names are never copied.
+#[pyfunction]
+fn compute_mutual_information<'py>(
+    py: Python<'py>,
+    matrix: &Bound<'py, PyAny>,
+    genes: &Bound<'py, PyAny>,
+) -> PyResult<Bound<'py, PyArray2<f64>>> {
+    let n_genes = gene_count(genes)?;
+    
+    // Dispatch on the input dtype without converting float32 to float64, and
+    // release the GIL while computing so other Python threads (e.g. loading
+    // the next dataset) keep running
+    let result = if let Ok(matrix) = matrix.extract::<PyReadonlyArray2<'py, f32>>() {
+        let view = matrix.as_array();
+        py.allow_threads(|| mutual_information_matrix(view, n_genes))?
+    } else {
+        let matrix = matrix.extract::<PyReadonlyArray2<'py, f64>>()?;
+        let view = matrix.as_array();
+        py.allow_threads(|| mutual_information_matrix(view, n_genes))?
+    };
+    
+    Ok(result.into_pyarray(py))
+}
+
+/// Running count, sum, minimum and maximum of a set of values
+#[derive(Clone, Copy)]
+struct Summary {
+    count: usize,
+    sum: f64,
+    min: f64,
+    max: f64,
+}
+
+impl Summary {
+    fn empty() -> Self {
+        Summary { count: 0, sum: 0.0, min: f64::INFINITY, max: f64::NEG_INFINITY }
+    }
+    
+    fn add(self, value: f64) -> Self {
+        Summary {
+            count: self.count + 1,
+            sum: self.sum + value,
+            min: self.min.min(value),
+            max: self.max.max(value),
+        }
+    }
+    
+    fn merge(self, other: Self) -> Self {
+        Summary {
+            count: self.count + other.count,
+            sum: self.sum + other.sum,
+            min: self.min.min(other.min),
+            max: self.max.max(other.max),
+        }
+    }
+    
+    fn into_tuple(self) -> (usize, f64, f64, f64) {
+        (self.count, self.sum, self.min, self.max)
+    }
+}
+
+/// Summarize the diagonal and the cross-gene values of a symmetric matrix
+///
+/// `upper_row(i)` returns row `i` of the upper triangle, from the diagonal onwards.
+/// Rows are summarized in parallel, each in a single pass that updates count,
+/// sum, min and max together.
+fn summarize_rows<'a, T, F>(n_genes: usize, upper_row: F) -> (Summary, Summary)
+where
+    T: Copy + Into<f64> + Sync + 'a,
+    F: Fn(usize) -> ArrayView1<'a, T> + Sync,
+{
+    (0..n_genes)
+        .into_par_iter()
+        .map(|i| {
+            let row = upper_row(i);
+            let diagonal = Summary::empty().add(row[0].into());
+            let pairs = row
+                .iter()
+                .skip(1)
+                .fold(Summary::empty(), |summary, &value| summary.add(value.into()));
+            (diagonal, pairs)
         })
-        .collect();
+        .reduce(
+            || (Summary::empty(), Summary::empty()),
+            |a, b| (a.0.merge(b.0), a.1.merge(b.1)),
+        )
+}
+
+/// Summarize a packed triangle holding row `i` of the symmetric matrix from
+/// column `i` onwards, for each row in turn
+fn triangle_summary<T: Copy + Into<f64> + Sync>(
+    values: ArrayView1<'_, T>,
+    n_genes: usize,
+) -> Result<(Summary, Summary), MutualInfoError> {
+    let expected = n_genes * (n_genes + 1) / 2;
+    if values.len() != expected {
+        return Err(MutualInfoError::TriangleLength { length: values.len(), expected, n_genes });
+    }
     
-    progress_bar.finish_with_message("Mutual information computation completed!");
+    Ok(summarize_rows(n_genes, move |i| {
+        let start = i * (2 * n_genes - i + 1) / 2;
+        values.slice_move(s![start..start + n_genes - i])
+    }))
+}
+
+/// Summarize the upper triangle of a dense symmetric matrix in place
+fn matrix_summary<T: Copy + Into<f64> + Sync>(
+    matrix: ArrayView2<'_, T>,
+    n_genes: usize,
+) -> Result<(Summary, Summary), MutualInfoError> {
+    let (rows, cols) = matrix.dim();
+    if rows != cols {
+        return Err(MutualInfoError::NotSquare { rows, cols });
+    }
+    if rows != n_genes {
+        return Err(MutualInfoError::DimensionMismatch { matrix_rows: rows, gene_count: n_genes });
+    }
     
-    // Build nested dictionary structure
-    for ((i, j), mi_value) in mi_results {
-        let gene_i = &gene_names[i];
-        let gene_j = &gene_names[j];
+    Ok(summarize_rows(n_genes, move |i| matrix.slice_move(s![i, i..])))
+}
+
+/// Summary statistics of an MI result.
+///
+/// `values` is either the float32 or float64 packed upper triangle written
+/// by the gvmi CLI (a memory-mapped `.npy` works without loading it), or a
+/// dense symmetric (n_genes, n_genes) matrix such as the one returned by
+/// `compute_mutual_information`, whose upper triangle is read in place.
+/// Returns `(count, sum, min, max)` for the diagonal (self-MI) and for the
+/// cross-gene pairs, computed in one pass over the data.
+#[pyfunction]
+fn triangle_statistics(
+    py: Python<'_>,
+    values: &Bound<'_, PyAny>,
+    n_genes: usize,
+) -> PyResult<((usize, f64, f64, f64), (usize, f64, f64, f64))> {
+    let (diagonal, pairs) = if let Ok(values) = values.extract::<PyReadonlyArray1<'_, f32>>() {
+        let view = values.as_array();
+        py.allow_threads(|| triangle_summary(view, n_genes))?
+    } else if let Ok(values) = values.extract::<PyReadonlyArray1<'_, f64>>() {
+        let view = values.as_array();
+        py.allow_threads(|| triangle_summary(view, n_genes))?
+    } else if let Ok(matrix) = values.extract::<PyReadonlyArray2<'_, f32>>() {
+        let view = matrix.as_array();
+        py.allow_threads(|| matrix_summary(view, n_genes))?
+    } else {
+        let matrix = values.extract::<PyReadonlyArray2<'_, f64>>()?;
+        let view = matrix.as_array();
+        py.allow_threads(|| matrix_summary(view, n_genes))?
+    };
+    Ok((diagonal.into_tuple(), pairs.into_tuple()))
+}
+
+/// Read-only nested-dict view over a mutual information matrix.
+///
+/// Provides the `mi[gene1][gene2]` access pattern of the former dictionary
+/// result; each inner dictionary is built only when its gene is indexed.
+/// `genes` may be any sequence of names (e.g. a pandas Index); it is kept as
+/// given and only read into Rust strings when names are first needed, with
+/// the gene-name lookup table built on the first lookup by name.
+#[pyclass(module = "gvmi")]
+struct MutualInfoDict {
+    matrix: Py<PyArray2<f64>>,
+    genes: Py<PyAny>,
+    n_genes: usize,
+    names: OnceLock<Vec<String>>,
+    index: OnceLock<HashMap<String, usize>>,
+}
+
+impl MutualInfoDict {
+    fn names(&self, py: Python<'_>) -> PyResult<&[String]> {
+        if let Some(names) = self.names.get() {
+            return Ok(names);
+        }
+        let names = self
+            .genes
+            .bind(py)
+            .try_iter()?
+            .map(|gene| gene?.extract::<String>())
+            .collect::<PyResult<Vec<_>>>()?;
+        Ok(self.names.get_or_init(|| names))
+    }
+    
+    fn index(&self, py: Python<'_>) -> PyResult<&HashMap<String, usize>> {
+        if let Some(index) = self.index.get() {
+            return Ok(index);
+        }
+        let index = self
+            .names(py)?
+            .iter()
+            .enumerate()
+            .map(|(i, gene)| (gene.clone(), i))
+            .collect();
+        Ok(self.index.get_or_init(|| index))
+    }
+    
+    /// Row of a gene given as any Python object; only strings can match
+    fn lookup(&self, gene: &Bound<'_, PyAny>) -> PyResult<Option<usize>> {
+        let Some(name) = gene.downcast::<PyString>().ok().and_then(|name| name.to_str().ok()) else {
+            return Ok(None);
+        };
+        Ok(self.index(gene.py())?.get(name).copied())
+    }
+    
+    /// Inner dictionary `{gene_j: mi_value}` for row `i`
+    fn row<'py>(&self, py: Python<'py>, i: usize) -> PyResult<Bound<'py, PyDict>> {
+        let matrix = self.matrix.bind(py).readonly();
+        let view = matrix.as_array();
         
-        // Get or create inner dictionary for gene_i
-        if !result.contains(gene_i)? {
-            let new_dict = PyDict::new(py);
-            result.set_item(gene_i, new_dict)?;
+        let inner = PyDict::new(py);
+        for (gene_j, &mi_value) in self.names(py)?.iter().zip(view.row(i).iter()) {
+            inner.set_item(gene_j, mi_value)?;
+        }
+        Ok(inner)
+    }
+}
+
+#[pymethods]
+impl MutualInfoDict {
+    #[new]
+    fn new(matrix: Bound<'_, PyArray2<f64>>, genes: &Bound<'_, PyAny>) -> PyResult<Self> {
+        let (rows, cols) = (matrix.shape()[0], matrix.shape()[1]);
+        if rows != cols {
+            return Err(MutualInfoError::NotSquare { rows, cols }.into());
+        }
+        let n_genes = gene_count(genes)?;
+        if rows != n_genes {
+            return Err(MutualInfoError::DimensionMismatch {
+                matrix_rows: rows,
+                gene_count: n_genes,
+            }.into());
         }
-        let item = result.get_item(gene_i)?.unwrap();
-        let inner_dict = item.downcast::<PyDict>()?;
-        inner_dict.set_item(gene_j, mi_value)?;
         
-        // For symmetric matrix, also set the reverse mapping (unless it's the diagonal)
-        if i != j {
-            if !result.contains(gene_j)? {
-                let new_dict = PyDict::new(py);
-                result.set_item(gene_j, new_dict)?;
-            }
-            let item_j = result.get_item(gene_j)?.unwrap();
-            let inner_dict_j = item_j.downcast::<PyDict>()?;
-            inner_dict_j.set_item(gene_i, mi_value)?;
+        Ok(MutualInfoDict {
+            matrix: matrix.unbind(),
+            genes: genes.clone().unbind(),
+            n_genes,
+            names: OnceLock::new(),
+            index: OnceLock::new(),
+        })
+    }
+    
+    /// The underlying (n_genes, n_genes) mutual information matrix
+    #[getter]
+    fn matrix<'py>(&self, py: Python<'py>) -> Bound<'py, PyArray2<f64>> {
+        self.matrix.bind(py).clone()
+    }
+    
+    /// Gene names in matrix order
+    fn keys<'py>(&self, py: Python<'py>) -> PyResult<Bound<'py, PyList>> {
+        PyList::new(py, self.names(py)?)
+    }
+    
+    fn __len__(&self) -> usize {
+        self.n_genes
+    }
+    
+    /// Inner dictionaries in matrix order, each built as the iterator reaches it
+    fn values(slf: PyRef<'_, Self>) -> MutualInfoRows {
+        MutualInfoRows { dict: slf.into(), position: 0, with_genes: false }
+    }
+    
+    /// `(gene, inner dictionary)` pairs in matrix order, built lazily
+    fn items(slf: PyRef<'_, Self>) -> MutualInfoRows {
+        MutualInfoRows { dict: slf.into(), position: 0, with_genes: true }
+    }
+    
+    /// Inner dictionary of `gene`, or `default` if it is not a known gene
+    #[pyo3(signature = (gene, default=None))]
+    fn get<'py>(
+        &self,
+        py: Python<'py>,
+        gene: &Bound<'py, PyAny>,
+        default: Option<Bound<'py, PyAny>>,
+    ) -> PyResult<Option<Bound<'py, PyAny>>> {
+        match self.lookup(gene)? {
+            Some(i) => Ok(Some(self.row(py, i)?.into_any())),
+            None => Ok(default),
         }
     }
     
-    Ok(result.into())
+    fn __contains__(&self, gene: &Bound<'_, PyAny>) -> PyResult<bool> {
+        Ok(self.lookup(gene)?.is_some())
+    }
+    
+    fn __iter__<'py>(&self, py: Python<'py>) -> PyResult<Bound<'py, PyAny>> {
+        Ok(PyList::new(py, self.names(py)?)?.as_any().try_iter()?.into_any())
+    }
+    
+    fn __getitem__<'py>(&self, py: Python<'py>, gene: &Bound<'py, PyAny>) -> PyResult<Bound<'py, PyDict>> {
+        let i = self
+            .lookup(gene)?
+            .ok_or_else(|| MutualInfoError::UnknownGene(gene.to_string()))?;
+        self.row(py, i)
+    }
+}
+
+/// Lazy iterator over the rows of a `MutualInfoDict`, returned by its
+/// `values()` and `items()` methods
+#[pyclass(module = "gvmi")]
+struct MutualInfoRows {
+    dict: Py<MutualInfoDict>,
+    position: usize,
+    with_genes: bool,
+}
+
+#[pymethods]
+impl MutualInfoRows {
+    fn __iter__(slf: PyRef<'_, Self>) -> PyRef<'_, Self> {
+        slf
+    }
+    
+    fn __next__<'py>(&mut self, py: Python<'py>) -> PyResult<Option<Bound<'py, PyAny>>> {
+        let dict = self.dict.bind(py).borrow();
+        let i = self.position;
+        if i >= dict.n_genes {
+            return Ok(None);
+        }
+        self.position += 1;
+        
+        let row = dict.row(py, i)?;
+        if self.with_genes {
+            Ok(Some((dict.names(py)?[i].as_str(), row).into_pyobject(py)?.into_any()))
+        } else {
+            Ok(Some(row.into_any()))
+        }
+    }
 }
 
 /// GVMI (GeneVector Mutual Information) - A Python module implemented in Rust 
@@ -186,5 +647,8 @@ fn compute_mutual_information(
 #[pymodule]
 fn gvmi(m: &Bound<'_, PyModule>) -> PyResult<()> {
     m.add_function(wrap_pyfunction!(compute_mutual_information, m)?)?;
+    m.add_function(wrap_pyfunction!(triangle_statistics, m)?)?;
+    m.add_class::<MutualInfoDict>()?;
+    m.add_class::<MutualInfoRows>()?;
     Ok(())
 }
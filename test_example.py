@@ -9,6 +9,11 @@ computation with numpy arrays and gene labels through the Python API.
 import numpy as np
 import gvmi
 
+from gvmi_utils import triangle_pairs
+
+# Number of quantile bins used by the Rust kernel
+N_BINS = 10
+
 def create_sample_data():
     """Create sample gene expression data for testing."""
     # Create a 5x100 matrix (5 genes, 100 samples)
@@ -40,6 +45,69 @@ def create_sample_data():
     
     return matrix, genes
 
+def reference_mutual_information(matrix):
+    """
+    Straightforward numpy version of the kernel, for checking its results.
+    
+    Each gene is binned against its own quantile edges (the value at sorted
+    position (k + 1) * n / N_BINS), and MI is computed in nats from the full
+    joint histogram of every pair, diagonal included.
+    """
+    n_genes, n_samples = matrix.shape
+    edges = np.sort(matrix, axis=1)[:, (np.arange(1, N_BINS) * n_samples) // N_BINS]
+    codes = (matrix[:, :, None] > edges[:, None, :]).sum(axis=2)
+    
+    result = np.empty((n_genes, n_genes))
+    for i in range(n_genes):
+        for j in range(n_genes):
+            joint = np.bincount(N_BINS * codes[i] + codes[j], minlength=N_BINS * N_BINS)
+            joint = joint.reshape(N_BINS, N_BINS) / n_samples
+            expected = np.outer(joint.sum(axis=1), joint.sum(axis=0))
+            nonzero = joint > 0
+            result[i, j] = np.sum(joint[nonzero] * np.log(joint[nonzero] / expected[nonzero]))
+    return result
+
+def check_against_reference():
+    """
+    Compare the kernel with the numpy reference on awkward inputs.
+    
+    Odd sample counts exercise the padding of the two-codes-per-byte
+    packing, and duplicate and constant genes exercise the deduplication of
+    identical code vectors.
+    """
+    rng = np.random.default_rng(0)
+    ok = True
+    for n_samples in (1, 2, 7, 101, 250):
+        matrix = rng.normal(size=(8, n_samples))
+        matrix[2] = matrix[0]                  # duplicate gene
+        matrix[3] = 0.0                        # constant gene
+        matrix[5] = matrix[3]                  # duplicate of a constant gene
+        matrix[6] = np.round(matrix[6])        # many ties
+        genes = [f"GENE_{i}" for i in range(matrix.shape[0])]
+        
+        for dtype in (np.float64, np.float32):
+            values = matrix.astype(dtype)
+            match = np.allclose(
+                gvmi.compute_mutual_information(values, genes),
+                reference_mutual_information(values),
+                atol=1e-12,
+            )
+            print(f"{n_samples:3d} samples, {np.dtype(dtype).name}: matches reference -> {match}")
+            ok &= match
+    return ok
+
+def check_triangle_pairs():
+    """Check that triangle_pairs inverts the packed order of np.triu_indices."""
+    ok = True
+    for n_genes in (1, 2, 5, 64):
+        for k in (0, 1):
+            rows, cols = np.triu_indices(n_genes, k=k)
+            got_rows, got_cols = triangle_pairs(np.arange(rows.size), n_genes, k=k)
+            match = np.array_equal(got_rows, rows) and np.array_equal(got_cols, cols)
+            print(f"{n_genes:3d} genes, k={k}: round-trips np.triu_indices -> {match}")
+            ok &= match
+    return ok
+
 def main():
     """Main function to test the mutual information computation."""
     print("Creating sample gene expression data...")
@@ -51,43 +119,57 @@ def main():
     
     print("Computing mutual information between all gene pairs...")
     try:
-        mi_results = gvmi.compute_mutual_information(matrix, genes)
+        mi_matrix = gvmi.compute_mutual_information(matrix, genes)
         
         print("\\nMutual Information Results:")
         print("=" * 50)
         
-        for gene1 in genes:
-            for gene2 in genes:
-                mi_value = mi_results[gene1][gene2]
-                print(f"{gene1} vs {gene2}: {mi_value:.6f}")
+        for i, gene1 in enumerate(genes):
+            for j, gene2 in enumerate(genes):
+                print(f"{gene1} vs {gene2}: {mi_matrix[i, j]:.6f}")
         
         print("\\nSymmetric matrix verification:")
         print("=" * 30)
         for i, gene1 in enumerate(genes):
             for j, gene2 in enumerate(genes[i+1:], i+1):
-                mi_12 = mi_results[gene1][gene2]
-                mi_21 = mi_results[gene2][gene1]
+                mi_12 = mi_matrix[i, j]
+                mi_21 = mi_matrix[j, i]
                 print(f"{gene1} vs {gene2}: {mi_12:.6f} == {mi_21:.6f} -> {abs(mi_12 - mi_21) < 1e-10}")
         
+        print("\\nDictionary-style access:")
+        print("=" * 24)
+        mi_dict = gvmi.MutualInfoDict(mi_matrix, genes)
+        print(f"mi_dict['GENE_A']['GENE_B']: {mi_dict['GENE_A']['GENE_B']:.6f}")
+        
         print("\\nHighest mutual information pairs:")
         print("=" * 35)
         
-        # Find highest MI pairs (excluding self-comparisons)
-        mi_pairs = []
-        for gene1 in genes:
-            for gene2 in genes:
-                if gene1 != gene2:
-                    mi_pairs.append((gene1, gene2, mi_results[gene1][gene2]))
+        # Find highest MI pairs from the upper triangle (excluding self-comparisons)
+        row_idx, col_idx = np.triu_indices(len(genes), k=1)
+        mi_values = mi_matrix[row_idx, col_idx]
         
-        # Sort by MI value and show top 5
-        mi_pairs.sort(key=lambda x: x[2], reverse=True)
-        for gene1, gene2, mi_val in mi_pairs[:5]:
-            print(f"{gene1} - {gene2}: {mi_val:.6f}")
+        # Select the top 5 by MI value, then sort only those
+        k = min(5, mi_values.size)
+        top_idx = np.argpartition(-mi_values, k - 1)[:k]
+        for idx in top_idx[np.argsort(-mi_values[top_idx])]:
+            print(f"{genes[row_idx[idx]]} - {genes[col_idx[idx]]}: {mi_values[idx]:.6f}")
             
     except Exception as e:
         print(f"Error computing mutual information: {e}")
         return 1
     
+    print("\\nReference check:")
+    print("=" * 16)
+    if not check_against_reference():
+        print("Mutual information differs from the numpy reference")
+        return 1
+    
+    print("\\nPacked triangle positions:")
+    print("=" * 26)
+    if not check_triangle_pairs():
+        print("triangle_pairs does not match np.triu_indices")
+        return 1
+    
     print("\\nTest completed successfully!")
     return 0
 
@@ -109,7 +109,7 @@ echo -e "${GREEN}🎉 GVMI updated successfully!${NC}"
 echo ""
 echo "You can now use:"
 echo "  gvmi --help                    # Show help"
-echo "  gvmi input.h5ad -o output.pkl # Process h5ad files"
+echo "  gvmi input.h5ad -o output.npy # Process h5ad files"
 echo ""
 
 # Show version info if available